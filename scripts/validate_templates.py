@@ -3,11 +3,16 @@
 Validate workflow templates index.json against schema and check file consistency.
 """
 
+import concurrent.futures
+import functools
 import json
+import mmap
 import os
+import re
 import sys
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, List, Tuple
 
 try:
     import jsonschema
@@ -15,17 +20,75 @@ except ImportError:
     print("Error: jsonschema package not installed. Run: pip install jsonschema")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# Matches the '-N' index in thumbnail names like 'name-1.webp' (the digits
+# must run right up to the extension dot or the end of the name)
+MEDIA_INDEX_RE = re.compile(r'-(\d+)(?=\.|$)')
+
+# Decomposes a thumbnail file name into (template name, index, media subtype)
+THUMBNAIL_RE = re.compile(r'(.+)-(\d+)\.(\w+)$')
+
 
 def load_json(file_path: Path) -> Dict:
-    """Load JSON file."""
+    """Load JSON file, preferring orjson's faster parser when available.
+
+    With orjson the file is mmapped so the parser reads straight from the
+    page cache instead of holding a second copy of the text in memory.
+    """
+    if orjson is not None:
+        with open(file_path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):  # e.g. empty file can't be mapped
+                return orjson.loads(f.read())
+            with mm:
+                mv = memoryview(mm)
+                try:
+                    return orjson.loads(mv)
+                finally:
+                    mv.release()
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
+@functools.lru_cache(maxsize=None)
+def compile_schema(schema_path: Path, mtime_ns: int):
+    """Compile the schema to a validator function, cached per (path, mtime)."""
+    # use_formats=False matches jsonschema's default of not asserting "format"
+    return fastjsonschema.compile(load_json(schema_path), use_formats=False)
+
+
 def validate_schema(index_data: List[Dict], schema_path: Path) -> Tuple[bool, List[str]]:
     """Validate index.json against JSON schema."""
     errors = []
-    
+
+    # fastjsonschema compiles the schema to straight-line code once; the
+    # interpretive jsonschema walk is only the fallback.
+    if fastjsonschema is not None:
+        try:
+            compile_schema(schema_path, schema_path.stat().st_mtime_ns)(index_data)
+            return True, []
+        # Only JsonSchemaValueException carries .message/.path; definition
+        # errors from a broken schema fall through to the generic handler
+        except fastjsonschema.JsonSchemaValueException as e:
+            errors.append(f"Schema validation error: {e.message}")
+            path = getattr(e, 'path', [])[1:]  # drop the leading 'data' element
+            if path:
+                errors.append(f"  at path: {'.'.join(str(p) for p in path)}")
+            return False, errors
+        except Exception as e:
+            errors.append(f"Unexpected error during validation: {str(e)}")
+            return False, errors
+
     try:
         schema = load_json(schema_path)
         jsonschema.validate(instance=index_data, schema=schema)
@@ -40,129 +103,126 @@ def validate_schema(index_data: List[Dict], schema_path: Path) -> Tuple[bool, Li
         return False, errors
 
 
-def check_file_consistency(index_data: List[Dict], templates_dir: Path) -> Tuple[bool, List[str], List[str]]:
-    """Check that all referenced files exist and all files are referenced."""
+def list_template_files(templates_dir: Path) -> Dict[str, os.DirEntry]:
+    """Scan the templates directory once and return a file name -> DirEntry map."""
+    with os.scandir(templates_dir) as it:
+        return {entry.name: entry for entry in it if entry.is_file()}
+
+
+def scan_templates(index_data: Iterable[Dict], existing_files: Dict[str, os.DirEntry]) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """Run all index-walking checks in a single pass over the categories.
+
+    Fuses the file-consistency, duplicate-name and required-thumbnail checks
+    so the template list is traversed exactly once. Returns
+    (consistency_errors, consistency_warnings, duplicate_errors, thumbnail_errors).
+    """
     errors = []
     warnings = []
-    
-    # Collect all referenced workflow and thumbnail files
+    duplicate_errors = []
+    thumbnail_errors = []
+    seen_names = {}
+
+    # Collect all referenced workflow files
     referenced_workflows = set()
-    referenced_thumbnails = set()
-    
+
+    # Index existing thumbnails by (name, subtype) up front, so per-template
+    # discovery is a dict lookup instead of existence probes per candidate
+    thumb_index = defaultdict(set)
+    for fname in existing_files:
+        m = THUMBNAIL_RE.match(fname)
+        if m:
+            # Keep the index as the raw matched string: '01' is not '1', and
+            # consumers load the literal {name}-1.{subtype} path
+            thumb_index[(m.group(1), m.group(3))].add(m.group(2))
+
+    # Bind method lookups once; the template loop is the hottest code in the script
+    get = dict.get
+    errors_append = errors.append
+    duplicates_append = duplicate_errors.append
+    thumbnails_append = thumbnail_errors.append
+    thumbs_get = thumb_index.get
+    add_workflow = referenced_workflows.add
+
     for category in index_data:
-        for template in category.get('templates', []):
-            name = template.get('name', '')
+        category_title = get(category, 'title', 'Unknown')
+        for template in get(category, 'templates') or ():
+            name = get(template, 'name', '')
+
+            # Duplicate template names across categories
+            if name in seen_names:
+                duplicates_append(
+                    f"Duplicate template name '{name}' found in categories "
+                    f"'{seen_names[name]}' and '{category_title}'"
+                )
+            else:
+                seen_names[name] = category_title
+
             if not name:
-                errors.append(f"Template in category '{category.get('title')}' missing name")
+                errors_append(f"Template in category '{get(category, 'title')}' missing name")
                 continue
-                
+
             # Workflow file
-            workflow_file = f"{name}.json"
-            referenced_workflows.add(workflow_file)
-            
-            # Thumbnail files (support multiple thumbnails)
-            media_subtype = template.get('mediaSubtype', '')
+            add_workflow(f"{name}.json")
+
+            # Each template needs at least one thumbnail; checking the index
+            # set avoids formatting a probe name per template
+            media_subtype = get(template, 'mediaSubtype', '')
             if media_subtype:
-                # Check for numbered thumbnails
-                for i in range(1, 10):  # Support up to 9 thumbnails
-                    thumbnail = f"{name}-{i}.{media_subtype}"
-                    thumbnail_path = templates_dir / thumbnail
-                    if thumbnail_path.exists():
-                        referenced_thumbnails.add(thumbnail)
-    
+                indices = thumbs_get((name, media_subtype))
+                if not indices or '1' not in indices:
+                    thumbnails_append(f"Missing required thumbnail: {name}-1.{media_subtype}")
+
     # Check all referenced workflow files exist
     for workflow in referenced_workflows:
-        workflow_path = templates_dir / workflow
-        if not workflow_path.exists():
+        if workflow not in existing_files:
             errors.append(f"Referenced workflow file not found: {workflow}")
-    
-    # Check all referenced thumbnail files exist
-    for thumbnail in referenced_thumbnails:
-        thumbnail_path = templates_dir / thumbnail
-        if not thumbnail_path.exists():
-            errors.append(f"Referenced thumbnail file not found: {thumbnail}")
-    
-    # Find orphaned files (files that exist but aren't referenced)
-    all_files = set(f.name for f in templates_dir.iterdir() if f.is_file())
-    
-    # Exclude special files
+
+    # Find orphaned files (files that exist but aren't referenced).
+    # Partition the listing into workflow and media files in one pass, with a
+    # single rpartition per name, so the orphan checks below are pure set algebra.
     special_files = {'index.json', 'index.schema.json', '.gitignore', 'README.md'}
-    all_files -= special_files
-    
-    # Separate workflow and media files
-    workflow_files = {f for f in all_files if f.endswith('.json')}
-    media_files = all_files - workflow_files
-    
+    workflow_files = set()
+    media_files = set()
+    for fname in existing_files:
+        if fname in special_files:
+            continue
+        stem, sep, ext = fname.rpartition('.')
+        if sep and ext == 'json':
+            workflow_files.add(fname)
+        else:
+            media_files.add(fname)
+
     # Check for orphaned workflows
     orphaned_workflows = workflow_files - referenced_workflows
     for orphan in orphaned_workflows:
         warnings.append(f"Workflow file not referenced in index.json: {orphan}")
-    
+
     # Check for orphaned media files
-    # For media files, we need to check if they match the pattern name-N.ext
-    potential_orphans = []
-    for media_file in media_files:
-        # Check if it matches any referenced template name pattern
-        is_referenced = False
-        for template_name in [w.replace('.json', '') for w in referenced_workflows]:
-            if media_file.startswith(f"{template_name}-") and media_file[len(template_name)+1:].split('.')[0].isdigit():
-                is_referenced = True
-                break
-        
-        if not is_referenced:
-            potential_orphans.append(media_file)
-    
-    for orphan in potential_orphans:
-        warnings.append(f"Media file not referenced in index.json: {orphan}")
-    
-    return len(errors) == 0, errors, warnings
+    # For media files, we need to check if they match the pattern name-N.ext.
+    # MEDIA_INDEX_RE finds every '-N' split point in one scan, so each media
+    # file costs one regex pass plus set lookups instead of a loop over all
+    # template names. Skipped outright when there is nothing to check.
+    if media_files:
+        template_names = {w[:-5] for w in referenced_workflows}
+        for media_file in media_files:
+            is_referenced = any(
+                media_file[:m.start()] in template_names
+                for m in MEDIA_INDEX_RE.finditer(media_file)
+            )
+            if not is_referenced:
+                warnings.append(f"Media file not referenced in index.json: {media_file}")
 
-
-def check_duplicate_names(index_data: List[Dict]) -> Tuple[bool, List[str]]:
-    """Check for duplicate template names across categories."""
-    errors = []
-    seen_names = {}
-    
-    for category in index_data:
-        category_title = category.get('title', 'Unknown')
-        for template in category.get('templates', []):
-            name = template.get('name', '')
-            if name in seen_names:
-                errors.append(
-                    f"Duplicate template name '{name}' found in categories "
-                    f"'{seen_names[name]}' and '{category_title}'"
-                )
-            else:
-                seen_names[name] = category_title
-    
-    return len(errors) == 0, errors
-
-
-def check_required_thumbnails(index_data: List[Dict], templates_dir: Path) -> Tuple[bool, List[str]]:
-    """Check that each template has at least one thumbnail."""
-    errors = []
-    
-    for category in index_data:
-        for template in category.get('templates', []):
-            name = template.get('name', '')
-            media_subtype = template.get('mediaSubtype', '')
-            
-            if not name or not media_subtype:
-                continue
-            
-            # Check for at least one thumbnail
-            thumbnail_1 = templates_dir / f"{name}-1.{media_subtype}"
-            if not thumbnail_1.exists():
-                errors.append(f"Missing required thumbnail: {name}-1.{media_subtype}")
-    
-    return len(errors) == 0, errors
+    return errors, warnings, duplicate_errors, thumbnail_errors
 
 
 def main():
     """Main validation function."""
     # Check for GitHub Actions environment
     is_github_actions = os.environ.get('GITHUB_ACTIONS') == 'true'
-    
+    if is_github_actions:
+        # Annotations are emitted in batched writes; don't flush per line
+        sys.stdout.reconfigure(line_buffering=False)
+
     # Determine paths
     script_dir = Path(__file__).parent
     repo_root = script_dir.parent
@@ -189,63 +249,74 @@ def main():
         print(f"❌ Error loading index.json: {e}")
         return 1
     
+    # Scan the templates directory once; all existence checks are set lookups
+    existing_files = list_template_files(templates_dir)
+
     all_errors = []
     all_warnings = []
-    
-    # Run validations
+
+    # Run validations. The schema walk and the fused template scan are
+    # independent once index_data and the listing are in hand, so run them
+    # concurrently.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        schema_future = executor.submit(validate_schema, index_data, schema_path)
+        scan_future = executor.submit(scan_templates, index_data, existing_files)
+        valid, schema_errors = schema_future.result()
+        errors, warnings, duplicate_errors, thumbnail_errors = scan_future.result()
+
     print("\n1️⃣  Validating against JSON schema...")
-    valid, errors = validate_schema(index_data, schema_path)
     if valid:
         print("   ✅ Schema validation passed")
     else:
         print("   ❌ Schema validation failed")
-        all_errors.extend(errors)
-    
+        all_errors.extend(schema_errors)
+
     print("\n2️⃣  Checking file consistency...")
-    valid, errors, warnings = check_file_consistency(index_data, templates_dir)
-    if valid and not warnings:
+    if not errors and not warnings:
         print("   ✅ File consistency check passed")
-    elif valid and warnings:
+    elif not errors and warnings:
         print("   ⚠️  File consistency check passed with warnings")
     else:
         print("   ❌ File consistency check failed")
     all_errors.extend(errors)
     all_warnings.extend(warnings)
-    
+
     print("\n3️⃣  Checking for duplicate names...")
-    valid, errors = check_duplicate_names(index_data)
-    if valid:
+    if not duplicate_errors:
         print("   ✅ No duplicate names found")
     else:
         print("   ❌ Duplicate names found")
-        all_errors.extend(errors)
-    
+        all_errors.extend(duplicate_errors)
+
     print("\n4️⃣  Checking required thumbnails...")
-    valid, errors = check_required_thumbnails(index_data, templates_dir)
-    if valid:
+    if not thumbnail_errors:
         print("   ✅ All templates have thumbnails")
     else:
         print("   ❌ Missing thumbnails")
-        all_errors.extend(errors)
+        all_errors.extend(thumbnail_errors)
     
-    # Print warnings
+    # Print warnings as one batched write instead of a syscall per line
     if all_warnings:
-        print("\nWarnings:")
+        lines = ["\nWarnings:"]
+        emit = lines.append
         for warning in all_warnings:
-            print(f"  ⚠️  {warning}")
+            emit(f"  ⚠️  {warning}")
             # GitHub Actions annotation
             if is_github_actions:
-                print(f"::warning file=templates/index.json::{warning}")
-    
+                emit(f"::warning file=templates/index.json::{warning}")
+        sys.stdout.write('\n'.join(lines) + '\n')
+
     # Summary
     print("\n" + "="*50)
     if all_errors:
-        print(f"❌ Validation failed with {len(all_errors)} error(s):\n")
+        lines = [f"❌ Validation failed with {len(all_errors)} error(s):\n"]
+        emit = lines.append
         for error in all_errors:
-            print(f"   • {error}")
+            emit(f"   • {error}")
             # GitHub Actions annotation for errors
             if is_github_actions:
-                print(f"::error file=templates/index.json::{error}")
+                emit(f"::error file=templates/index.json::{error}")
+        sys.stdout.write('\n'.join(lines) + '\n')
         return 1
     else:
         if all_warnings: